@@ -24,17 +24,38 @@ Exclusions:
 
 from __future__ import annotations
 
+import atexit
+import bisect
+import functools
+import heapq
 import ipaddress
 import json
 import os
+import re
+import socket
 import sys
+import tempfile
 import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:  # optional: much faster JSON decoding straight from bytes
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # optional: HTTP/2 lets concurrent fetches share one connection (needs h2)
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
 
 # ----------------------
 # Types
@@ -42,6 +63,111 @@ import requests
 IPv4Net = ipaddress.IPv4Network
 IPv6Net = ipaddress.IPv6Network
 IPNet = Union[IPv4Net, IPv6Net]
+# ip version -> (ascending starts, ascending ends) of disjoint exclusion ranges
+ExclusionIndex = Dict[int, Tuple[List[int], List[int]]]
+
+# ----------------------
+# Prefix parsing
+# ----------------------
+# Applied with fullmatch: '$' would also accept a trailing newline
+_V4_PREFIX_RE = re.compile(r"((?:0|[1-9]\d{0,2})(?:\.(?:0|[1-9]\d{0,2})){3})/(\d{1,2})")
+_V6_PREFIX_RE = re.compile(r"([0-9a-fA-F:.]+)/(\d{1,3})")
+
+# Netmask integer per prefix length, so host bits are cleared with one '&'
+_V4_MASKS = tuple(((1 << 32) - 1) ^ ((1 << (32 - i)) - 1) for i in range(33))
+_V6_MASKS = tuple(((1 << 128) - 1) ^ ((1 << (128 - i)) - 1) for i in range(129))
+
+def _parse_prefix(pfx: str) -> Tuple[int, int, int]:
+    """
+    Parse a CIDR string (host bits allowed) into (version, network_int, prefixlen)
+    without going through the generic ipaddress parser for well-formed input.
+    Raises ValueError for invalid input, like ipaddress.ip_network().
+    """
+    m = _V4_PREFIX_RE.fullmatch(pfx)
+    if m:
+        plen = int(m.group(2))
+        if plen <= 32:
+            try:
+                packed = socket.inet_aton(m.group(1))
+            except OSError:
+                raise ValueError(f"{pfx!r} does not appear to be an IPv4 network") from None
+            return 4, int.from_bytes(packed, "big") & _V4_MASKS[plen], plen
+    else:
+        m = _V6_PREFIX_RE.fullmatch(pfx)
+        if m and int(m.group(2)) <= 128:
+            plen = int(m.group(2))
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, m.group(1))
+            except OSError:
+                pass
+            else:
+                return 6, int.from_bytes(packed, "big") & _V6_MASKS[plen], plen
+    # Unusual spellings (and the error message) come from the stdlib parser
+    net = ipaddress.ip_network(pfx, strict=False)
+    return net.version, int(net.network_address), net.prefixlen
+
+@functools.lru_cache(maxsize=4096)
+def _parse_net(cidr: str) -> IPNet:
+    """Memoized CIDR -> network object (networks are immutable, so sharing is safe)."""
+    version, addr, plen = _parse_prefix(cidr)
+    return IPv4Net((addr, plen)) if version == 4 else IPv6Net((addr, plen))
+
+# ----------------------
+# Compact prefix storage
+# ----------------------
+_U64 = (1 << 64) - 1
+
+@dataclass
+class PrefixSet:
+    """
+    Prefixes of one address family as parallel arrays (structure of arrays):
+    5 bytes per IPv4 entry and 17 per IPv6 entry (two 64-bit halves), instead
+    of one IPv4Network/IPv6Network object each. Text is only produced by lines().
+    """
+    version: int
+    addrs: array
+    plens: array
+
+    @classmethod
+    def empty(cls, version: int) -> "PrefixSet":
+        return cls(version, array("I" if version == 4 else "Q"), array("B"))
+
+    @classmethod
+    def from_pairs(cls, version: int, pairs: Sequence[Tuple[int, int]]) -> "PrefixSet":
+        """Build from (network_int, prefixlen) pairs."""
+        if version == 4:
+            addrs = array("I", [a for a, _ in pairs])
+        else:
+            addrs = array("Q", [half for a, _ in pairs for half in (a >> 64, a & _U64)])
+        return cls(version, addrs, array("B", [p for _, p in pairs]))
+
+    @property
+    def bits(self) -> int:
+        return 32 if self.version == 4 else 128
+
+    def append(self, addr: int, plen: int) -> None:
+        if self.version == 4:
+            self.addrs.append(addr)
+        else:
+            self.addrs.append(addr >> 64)
+            self.addrs.append(addr & _U64)
+        self.plens.append(plen)
+
+    def __len__(self) -> int:
+        return len(self.plens)
+
+    def pairs(self) -> Iterator[Tuple[int, int]]:
+        """Iterate (network_int, prefixlen) pairs in storage order."""
+        if self.version == 4:
+            return zip(self.addrs, self.plens)
+        halves = iter(self.addrs)
+        return (((hi << 64) | lo, plen) for hi, lo, plen in zip(halves, halves, self.plens))
+
+    def lines(self) -> Iterator[str]:
+        """Iterate CIDR strings, formatted as ipaddress would."""
+        if self.version == 4:
+            return (f"{socket.inet_ntoa(a.to_bytes(4, 'big'))}/{p}" for a, p in self.pairs())
+        return (f"{ipaddress.IPv6Address(a)}/{p}" for a, p in self.pairs())
 
 # ----------------------
 # Exclusions helpers (self-contained)
@@ -62,82 +188,218 @@ def load_exclusions(path: str = "feeds/exclusions.txt") -> List[IPNet]:
             if not line or line.startswith("#"):
                 continue
             try:
-                nets.append(ipaddress.ip_network(line, strict=False))
+                nets.append(_parse_net(line))
             except ValueError:
                 print(f"[exclusions] WARN: Skipping invalid CIDR at line {lineno}: {line}", file=sys.stderr)
     return nets
 
-def _subtract_one(net: IPNet, excludes: Sequence[IPNet]) -> List[IPNet]:
+def _range_to_cidrs(lo: int, hi: int, bits: int) -> List[Tuple[int, int]]:
     """
-    Subtract multiple exclusion networks from a single network.
-    Uses ipaddress.address_exclude() where applicable.
+    Minimal list of (network_int, prefixlen) blocks covering [lo, hi] inclusive.
+    Each step emits the largest block that is aligned at lo (lowest set bit)
+    and still fits in the remaining range.
     """
-    result: List[IPNet] = [net]
-    for ex in excludes:
-        # Skip family mismatch early
-        if net.version != ex.version:
-            continue
-        new_result: List[IPNet] = []
-        for r in result:
-            if ex.subnet_of(r):
-                # ex is inside r -> split r into pieces that exclude ex
-                new_result.extend(r.address_exclude(ex))
-            elif r.subnet_of(ex) or r == ex:
-                # r is fully covered by ex (drop it)
-                continue
-            else:
-                # disjoint
-                new_result.append(r)
-        result = new_result
-        if not result:
-            break
+    out: List[Tuple[int, int]] = []
+    while lo <= hi:
+        align = lo & -lo if lo else 1 << bits
+        fit = 1 << ((hi - lo + 1).bit_length() - 1)
+        size = align if align < fit else fit
+        out.append((lo, bits - size.bit_length() + 1))
+        lo += size
+    return out
+
+def _subtract_one(
+    start: int,
+    end: int,
+    ex_starts: Sequence[int],
+    ex_ends: Sequence[int],
+    lo: int,
+    hi: int,
+    bits: int,
+) -> List[Tuple[int, int]]:
+    """
+    Subtract the disjoint, ascending exclusion ranges ex_*[lo:hi] from the
+    range [start, end] and return the remainder as minimal (network_int,
+    prefixlen) blocks.
+    """
+    result: List[Tuple[int, int]] = []
+    cur = start
+    for i in range(lo, hi):
+        ex_start = ex_starts[i]
+        if ex_start > cur:
+            result.extend(_range_to_cidrs(cur, min(ex_start - 1, end), bits))
+        if ex_ends[i] >= cur:
+            cur = ex_ends[i] + 1
+        if cur > end:
+            return result
+    result.extend(_range_to_cidrs(cur, end, bits))
     return result
 
-def apply_exclusions(nets: Iterable[IPNet], excludes: Iterable[IPNet]) -> List[IPNet]:
+def _exclusion_bounds(excludes: Sequence[IPNet]) -> Tuple[List[int], List[int]]:
     """
-    Apply exclusions to an iterable of networks (mixed IPv4/IPv6 allowed).
-    Returns a minimal, sorted list of networks after subtraction.
+    Collapse one family's exclusions into disjoint blocks and return parallel
+    lists of their first/last address integers (both ascending).
     """
-    excludes = list(excludes)
-    excludes_v4 = [e for e in excludes if isinstance(e, ipaddress.IPv4Network)]
-    excludes_v6 = [e for e in excludes if isinstance(e, ipaddress.IPv6Network)]
+    nets = collapse_and_sort(excludes)
+    starts = [int(e.network_address) for e in nets]
+    ends = [int(e.broadcast_address) for e in nets]
+    return starts, ends
 
-    out: List[IPNet] = []
-    for n in nets:
-        exs = excludes_v4 if isinstance(n, ipaddress.IPv4Network) else excludes_v6
-        out.extend(_subtract_one(n, exs))
+def index_exclusions(excludes: Iterable[IPNet]) -> ExclusionIndex:
+    """
+    Split exclusions by family and precompute their lookup bounds.
+    Build once and pass the result to every apply_exclusions() call.
+    """
+    by_version: Dict[int, List[IPNet]] = {4: [], 6: []}
+    for e in excludes:
+        by_version[e.version].append(e)
+    return {version: _exclusion_bounds(nets) for version, nets in by_version.items()}
 
-    collapsed = list(ipaddress.collapse_addresses(out))
-    collapsed.sort(key=lambda n: (n.version, int(n.network_address), n.prefixlen))
-    return collapsed
+def apply_exclusions(prefixes: PrefixSet, bounds: ExclusionIndex) -> PrefixSet:
+    """
+    Apply exclusions (as built by index_exclusions) to a normalized PrefixSet
+    (e.g. the output of normalize()).
+    Returns a minimal, sorted PrefixSet after subtraction.
+    With no exclusions for its family, prefixes is returned unchanged.
+    """
+    ex_starts, ex_ends = bounds[prefixes.version]
+    if not ex_starts:
+        return prefixes
+
+    # Subtraction and collapse happen in one pass: carving a block out of one
+    # network of a collapsed, sorted list leaves a minimal cover that cannot
+    # merge with any neighbour, so untouched networks pass through as-is and
+    # residues are emitted in place, already in order.
+    bits = prefixes.bits
+    n_ex = len(ex_ends)
+    out: List[Tuple[int, int]] = []
+    for start, plen in prefixes.pairs():
+        end = start | ((1 << (bits - plen)) - 1)
+        # Only exclusions with end >= start and start <= end can overlap;
+        # the first candidate decides, so untouched networks cost one bisect
+        lo = bisect.bisect_left(ex_ends, start)
+        if lo == n_ex or ex_starts[lo] > end:
+            out.append((start, plen))
+        else:
+            hi = bisect.bisect_right(ex_starts, end, lo)
+            out.extend(_subtract_one(start, end, ex_starts, ex_ends, lo, hi, bits))
+    return PrefixSet.from_pairs(prefixes.version, out)
 
 # ----------------------
 # Normalization / IO
 # ----------------------
+def _collapse_pairs(pairs: Iterable[Tuple[int, int]], bits: int) -> List[Tuple[int, int]]:
+    """
+    Collapse (network_int, prefixlen) pairs sorted by (network_int, prefixlen).
+    Single pass: drop entries covered by the previous kept block, then merge
+    the top of the stack with its lower sibling while possible.
+    """
+    stack: List[Tuple[int, int]] = []
+    for addr, plen in pairs:
+        if stack:
+            top_addr, top_plen = stack[-1]
+            shift = bits - top_plen
+            if addr >> shift == top_addr >> shift:
+                # covered by (or equal to) the previous block
+                continue
+        stack.append((addr, plen))
+        while len(stack) > 1:
+            hi_addr, hi_plen = stack[-1]
+            lo_addr, lo_plen = stack[-2]
+            if hi_plen != lo_plen or lo_addr ^ hi_addr != 1 << (bits - hi_plen):
+                break
+            del stack[-1]
+            stack[-1] = (lo_addr, lo_plen - 1)
+    return stack
+
+def _collapse_families(
+    v4_pairs: List[Tuple[int, int]],
+    v6_pairs: List[Tuple[int, int]],
+) -> List[IPNet]:
+    """Sort and collapse per-family pairs, then build networks (IPv4 first)."""
+    v4_pairs.sort()
+    v6_pairs.sort()
+    return [
+        *(IPv4Net(p) for p in _collapse_pairs(v4_pairs, 32)),
+        *(IPv6Net(p) for p in _collapse_pairs(v6_pairs, 128)),
+    ]
+
 def collapse_and_sort(nets: Iterable[IPNet]) -> List[IPNet]:
     """Collapse adjacent/sibling prefixes and return stable order."""
-    collapsed = list(ipaddress.collapse_addresses(nets))
-    collapsed.sort(key=lambda n: (n.version, int(n.network_address), n.prefixlen))
-    return collapsed
-
-def collapse_mixed(v4: Iterable[IPv4Net], v6: Iterable[IPv6Net]) -> List[IPNet]:
-    """Collapse IPv4 and IPv6 lists separately, then concatenate."""
-    v4c = collapse_and_sort(v4)
-    v6c = collapse_and_sort(v6)
-    return [*v4c, *v6c]
-
-def write_cidrs(path: Path, nets: Iterable[IPNet]) -> None:
-    """Write one CIDR per line to path (creates parent dirs)."""
+    v4_pairs: List[Tuple[int, int]] = []
+    v6_pairs: List[Tuple[int, int]] = []
+    for n in nets:
+        (v4_pairs if n.version == 4 else v6_pairs).append((int(n.network_address), n.prefixlen))
+    return _collapse_families(v4_pairs, v6_pairs)
+
+def merge_normalized(version: int, groups: Iterable[PrefixSet]) -> PrefixSet:
+    """
+    Merge already-normalized PrefixSets of one address family into a single
+    normalized set: a k-way merge plus one linear collapse pass, no re-sort.
+    """
+    groups = [g for g in groups if len(g)]
+    if not groups:
+        return PrefixSet.empty(version)
+    if len(groups) == 1:
+        return groups[0]
+    merged = heapq.merge(*(g.pairs() for g in groups))
+    return PrefixSet.from_pairs(version, _collapse_pairs(merged, groups[0].bits))
+
+def write_cidrs(path: Path, *sets: PrefixSet) -> None:
+    """Write one CIDR per line to path, sets in order (creates parent dirs)."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        for n in nets:
-            f.write(str(n) + "\n")
+    # One joined buffer, one write, instead of a write per line
+    lines = "\n".join(line for ps in sets for line in ps.lines())
+    path.write_bytes((lines + "\n" if lines else "").encode("ascii"))
 
 # ----------------------
 # RIPEstat client (Announced Prefixes)
 # ----------------------
 RIPESTAT_BASE = "https://stat.ripe.net/data/announced-prefixes/data.json"  # cite
 
+# Upper bound on concurrent RIPEstat requests (also the client's connection
+# limit; the HTTP/2 client multiplexes them over a single connection)
+MAX_FETCH_WORKERS = 16
+# Feed files are independent, so they are written from a small pool
+WRITE_WORKERS = 4
+
+HTTP_HEADERS = {
+    "User-Agent": "asn-threat-feeds/1.0",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Errors that trigger a retry, for whichever HTTP client is in use
+HTTP_ERRORS: Tuple[type, ...] = (requests.RequestException,)
+if httpx is not None:
+    HTTP_ERRORS += (httpx.HTTPError,)
+
+HttpClient = Union[requests.Session, "httpx.Client"]
+
+def _make_session(pool_size: int = 20) -> HttpClient:
+    """
+    Create a keep-alive client with compressed responses.
+    With httpx + h2 installed this is an HTTP/2 httpx.Client, which multiplexes
+    concurrent requests over a single connection (one TLS handshake);
+    otherwise a requests.Session with a sized HTTPS pool.
+    """
+    if httpx is not None:
+        return httpx.Client(
+            http2=True,
+            headers=HTTP_HEADERS,
+            timeout=30,
+            # requests follows redirects by default; httpx raises on 3xx unless told to
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    s.headers.update(HTTP_HEADERS)
+    return s
+
+# Shared fallback for callers that do not pass their own session
+SESSION = _make_session()
+atexit.register(SESSION.close)
+
 @dataclass
 class RipeWindow:
     start_iso: Optional[str] = None
@@ -170,22 +432,112 @@ def _compute_time_window(start_days: Optional[int], end_days: Optional[int]) ->
 
     return RipeWindow(start_iso, end_iso)
 
+def _prefix_entry_hook(obj: dict):
+    """
+    json object_hook: reduce each {'prefix': ..., 'timelines': [...]} entry to
+    its prefix string as soon as it is decoded, so the (unused) timelines do
+    not stay alive for the rest of the parse.
+    """
+    if "prefix" in obj and "timelines" in obj:
+        return obj["prefix"]
+    return obj
+
+# ----------------------
+# RIPEstat response cache (ETag / max-age)
+# ----------------------
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+def _cache_paths(cache_dir: Path, resource: str) -> Tuple[Path, Path]:
+    """Body and metadata file for one ASN's cached RIPEstat response."""
+    return cache_dir / f"ripestat_{resource}.json", cache_dir / f"ripestat_{resource}.meta.json"
+
+def _cache_key(params: dict, start_days: Optional[int], end_days: Optional[int]) -> dict:
+    """
+    Identify a query across runs. starttime/endtime are derived from 'now', so
+    they change every run; key on the day offsets instead. An offset of 0 means
+    "now" and is stable as-is; other offsets move with the date, so the UTC day
+    is included when one is set.
+    """
+    key = {k: v for k, v in params.items() if k not in ("starttime", "endtime")}
+    key["start_days"] = start_days
+    key["end_days"] = end_days
+    if start_days or end_days:
+        key["date"] = datetime.now(timezone.utc).date().isoformat()
+    return key
+
+def _load_cache(cache_dir: Path, key: dict) -> Optional[Tuple[bytes, dict]]:
+    """
+    Return (body, meta) for a cached response to the same query key,
+    or None if there is no usable entry.
+    """
+    body_path, meta_path = _cache_paths(cache_dir, str(key["resource"]))
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        body = body_path.read_bytes()
+    except (OSError, ValueError):
+        return None
+    if meta.get("key") != key:
+        return None
+    return body, meta
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write data to a temp file next to path, then rename it into place."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+def _drop_cache(cache_dir: Path, key: dict) -> None:
+    """Remove one ASN's cache entry (metadata first, so a half-removed entry is a miss)."""
+    body_path, meta_path = _cache_paths(cache_dir, str(key["resource"]))
+    try:
+        meta_path.unlink(missing_ok=True)
+        body_path.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"[ripe] WARN: could not remove cache for AS{key['resource']}: {e}", file=sys.stderr)
+
+def _store_cache(cache_dir: Path, key: dict, body: bytes, headers) -> None:
+    """Persist a response body with its ETag and freshness deadline."""
+    cache_control = headers.get("Cache-Control", "")
+    m = _MAX_AGE_RE.search(cache_control)
+    max_age = int(m.group(1)) if m and "no-cache" not in cache_control else 0
+    etag = headers.get("ETag")
+    if "no-store" in cache_control or not (etag or max_age):
+        return
+    meta = {"key": key, "etag": etag, "expires": time.time() + max_age}
+    body_path, meta_path = _cache_paths(cache_dir, str(key["resource"]))
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Drop the old metadata first: until the new one lands, the entry is a miss
+        meta_path.unlink(missing_ok=True)
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+    except OSError as e:
+        print(f"[ripe] WARN: could not write cache for AS{key['resource']}: {e}", file=sys.stderr)
+
 def fetch_asn_prefixes_from_ripestat(
     asn: str,
     min_peers: int,
     start_days: Optional[int] = None,
     end_days: Optional[int] = None,
-    session: Optional[requests.Session] = None,
+    session: Optional[HttpClient] = None,
     retries: int = 3,
     backoff_sec: float = 1.5,
-) -> Tuple[List[IPv4Net], List[IPv6Net]]:
+    cache_dir: Optional[Path] = None,
+) -> Tuple[PrefixSet, PrefixSet]:
     """
-    Query RIPEstat Announced Prefixes for the given ASN and return IPv4/IPv6 lists.
+    Query RIPEstat Announced Prefixes for the given ASN and return IPv4/IPv6 sets.
 
     - min_peers maps to RIPEstat 'min_peers_seeing' (default 10 per RIPEstat docs).  # cite
     - Optional start/end derived from START_DAYS/END_DAYS.
+    - Optional cache_dir: responses are cached per ASN; a fresh entry (Cache-Control
+      max-age) skips the request, a stale one is revalidated with If-None-Match.
 
-    Returns (v4_list, v6_list).
+    Returns (v4_set, v6_set).
     """
     params = {
         "resource": asn.lstrip().lstrip("AS").lstrip("as"),
@@ -198,34 +550,68 @@ def fetch_asn_prefixes_from_ripestat(
         params["starttime"] = window.start_iso
     if window.end_iso:
         params["endtime"] = window.end_iso
+    key = _cache_key(params, start_days, end_days)
 
-    s = session or requests.Session()
+    s = session or SESSION
     attempt = 0
+    skip_cache = False
     while True:
         attempt += 1
         try:
-            resp = s.get(RIPESTAT_BASE, params=params, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
+            cached = _load_cache(cache_dir, key) if cache_dir and not skip_cache else None
+            resp = None
+            from_cache = False
+            if cached and cached[1].get("expires", 0) > time.time():
+                body = cached[0]
+                from_cache = True
+            else:
+                headers = {}
+                if cached and cached[1].get("etag"):
+                    headers["If-None-Match"] = cached[1]["etag"]
+                resp = s.get(RIPESTAT_BASE, params=params, headers=headers, timeout=30)
+                if cached and resp.status_code == 304:
+                    body = cached[0]
+                    from_cache = True
+                else:
+                    resp.raise_for_status()
+                    body = resp.content
             # Expected structure: {'data': {'prefixes': [{'prefix': 'x/y', 'timelines': [...]}, ...], ...}}
+            # Without orjson, prefix entries arrive already reduced to 'x/y'
+            # strings (see _prefix_entry_hook).
+            try:
+                if orjson is not None:
+                    data = orjson.loads(body)
+                else:
+                    data = json.loads(body, object_hook=_prefix_entry_hook)
+            except json.JSONDecodeError as e:
+                if not from_cache:
+                    raise
+                # Corrupt cache entry: discard it and refetch unconditionally
+                print(f"[ripe] WARN: discarding unreadable cache entry for {asn}: {e}", file=sys.stderr)
+                _drop_cache(cache_dir, key)
+                skip_cache = True
+                attempt -= 1  # not a failed request
+                continue
+            if cache_dir and resp is not None:
+                # Also refreshes the deadline after a 304
+                _store_cache(cache_dir, key, body, resp.headers)
             d = data.get("data", {})
             pref_entries = d.get("prefixes", [])
-            v4: List[IPv4Net] = []
-            v6: List[IPv6Net] = []
-            for entry in pref_entries:
-                pfx = entry.get("prefix")
-                if not pfx:
+            v4 = PrefixSet.empty(4)
+            v6 = PrefixSet.empty(6)
+            for pfx in pref_entries:
+                if isinstance(pfx, dict):
+                    pfx = pfx.get("prefix")
+                if not pfx or not isinstance(pfx, str):
                     continue
                 try:
-                    net = ipaddress.ip_network(pfx, strict=False)
+                    version, addr, plen = _parse_prefix(pfx)
                 except ValueError:
                     continue
-                if isinstance(net, ipaddress.IPv4Network):
-                    v4.append(net)
-                else:
-                    v6.append(net)
+                (v4 if version == 4 else v6).append(addr, plen)
             return v4, v6
-        except (requests.RequestException, json.JSONDecodeError) as e:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        except (*HTTP_ERRORS, json.JSONDecodeError) as e:
             if attempt > retries:
                 raise
             sleep_for = backoff_sec * attempt
@@ -235,9 +621,11 @@ def fetch_asn_prefixes_from_ripestat(
 # ----------------------
 # Builder
 # ----------------------
-def normalize(nets: Iterable[IPNet]) -> List[IPNet]:
-    """Your existing dedupe/minimize pipeline can replace this if desired."""
-    return collapse_and_sort(nets)
+def normalize(prefixes: PrefixSet) -> PrefixSet:
+    """Dedupe/minimize one family: sort, then collapse adjacent/sibling prefixes."""
+    return PrefixSet.from_pairs(
+        prefixes.version, _collapse_pairs(sorted(prefixes.pairs()), prefixes.bits)
+    )
 
 def build_feeds(
     asns: List[str],
@@ -245,9 +633,11 @@ def build_feeds(
     start_days: Optional[int] = None,
     end_days: Optional[int] = None,
     out_dir: Path = Path("feeds"),
+    cache_dir: Optional[Path] = None,
 ) -> None:
     """
     Build all per-ASN and combined feeds, applying optional exclusions.
+    If cache_dir is set, RIPEstat responses are cached/revalidated there.
     """
 
     # Load exclusions once
@@ -257,61 +647,78 @@ def build_feeds(
         print(f"[exclusions] Loaded {len(exclusions)} exclusion networks from {exclusions_path}")
     else:
         print("[exclusions] No exclusions found (proceeding without filtering)")
+    exclusion_index = index_exclusions(exclusions)
 
-    combined_v4: List[IPv4Net] = []
-    combined_v6: List[IPv6Net] = []
-
-    with requests.Session() as sess:
-        for asn in asns:
-            asn_norm = asn.strip()
-            if not asn_norm:
-                continue
-            # Ensure "AS12345" form in filenames
-            if not asn_norm.upper().startswith("AS"):
-                asn_norm = "AS" + asn_norm
-
-            print(f"[builder] Processing {asn_norm} ...")
-
-            v4_raw, v6_raw = fetch_asn_prefixes_from_ripestat(
-                asn=asn_norm,
-                min_peers=min_peers,
-                start_days=start_days,
-                end_days=end_days,
-                session=sess,
-            )
-
-            v4_final = normalize(v4_raw)
-            v6_final = normalize(v6_raw)
+    per_asn_v4: List[PrefixSet] = []
+    per_asn_v6: List[PrefixSet] = []
 
-            if exclusions:
-                v4_final = apply_exclusions(v4_final, exclusions)
-                v6_final = apply_exclusions(v6_final, exclusions)
-
-            # Write per-ASN files
-            write_cidrs(out_dir / f"{asn_norm.lower()}_ipv4.txt", v4_final)
-            write_cidrs(out_dir / f"{asn_norm.lower()}_ipv6.txt", v6_final)
-
-            # Per-ASN _all.txt (inside build_feeds loop)
-            asn_all = collapse_mixed(v4_final, v6_final)
-            write_cidrs(out_dir / f"{asn_norm.lower()}_all.txt", asn_all)
-
-            combined_v4.extend(v4_final)
-            combined_v6.extend(v6_final)
-
-    # Combined outputs
-    combined_v4 = normalize(combined_v4)
-    combined_v6 = normalize(combined_v6)
-
-    if exclusions:
-        combined_v4 = apply_exclusions(combined_v4, exclusions)
-        combined_v6 = apply_exclusions(combined_v6, exclusions)
-
-    write_cidrs(out_dir / "combined_ipv4.txt", combined_v4)
-    write_cidrs(out_dir / "combined_ipv6.txt", combined_v6)
-
-    # Global combined_all.txt (after combined_v4/combined_v6 are finalized)
-    combined_all = collapse_mixed(combined_v4, combined_v6)
-    write_cidrs(out_dir / "combined_all.txt", combined_all)
+    asn_list: List[str] = []
+    for asn in asns:
+        asn_norm = asn.strip()
+        if not asn_norm:
+            continue
+        # Ensure "AS12345" form in filenames
+        if not asn_norm.upper().startswith("AS"):
+            asn_norm = "AS" + asn_norm
+        asn_list.append(asn_norm)
+
+    workers = max(1, min(MAX_FETCH_WORKERS, len(asn_list)))
+
+    writes = []
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as writer:
+        # Size the connection limit to the worker count so fetches reuse connections
+        with _make_session(workers) as sess, ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {}
+            for asn_norm in asn_list:
+                print(f"[builder] Processing {asn_norm} ...")
+                fut = ex.submit(
+                    fetch_asn_prefixes_from_ripestat,
+                    asn=asn_norm,
+                    min_peers=min_peers,
+                    start_days=start_days,
+                    end_days=end_days,
+                    session=sess,
+                    cache_dir=cache_dir,
+                )
+                futures[fut] = asn_norm
+
+            # Fetches run concurrently; normalization stays on this thread
+            for fut in as_completed(futures):
+                asn_norm = futures[fut]
+                v4_raw, v6_raw = fut.result()
+
+                v4_final = normalize(v4_raw)
+                v6_final = normalize(v6_raw)
+
+                if exclusions:
+                    v4_final = apply_exclusions(v4_final, exclusion_index)
+                    v6_final = apply_exclusions(v6_final, exclusion_index)
+
+                # Write per-ASN files
+                writes.append(writer.submit(write_cidrs, out_dir / f"{asn_norm.lower()}_ipv4.txt", v4_final))
+                writes.append(writer.submit(write_cidrs, out_dir / f"{asn_norm.lower()}_ipv6.txt", v6_final))
+
+                # Per-ASN _all.txt: both sets are already normalized, IPv4 first
+                writes.append(writer.submit(write_cidrs, out_dir / f"{asn_norm.lower()}_all.txt", v4_final, v6_final))
+
+                per_asn_v4.append(v4_final)
+                per_asn_v6.append(v6_final)
+
+        # Combined outputs: merge the sorted per-ASN sets instead of re-collapsing.
+        # Per-ASN sets are already filtered, so no second exclusion pass is
+        # needed: merging cannot reintroduce excluded space.
+        combined_v4 = merge_normalized(4, per_asn_v4)
+        combined_v6 = merge_normalized(6, per_asn_v6)
+
+        writes.append(writer.submit(write_cidrs, out_dir / "combined_ipv4.txt", combined_v4))
+        writes.append(writer.submit(write_cidrs, out_dir / "combined_ipv6.txt", combined_v6))
+
+        # Global combined_all.txt (after combined_v4/combined_v6 are finalized)
+        writes.append(writer.submit(write_cidrs, out_dir / "combined_all.txt", combined_v4, combined_v6))
+
+        # Surface any write error
+        for w in writes:
+            w.result()
 
     print("[builder] Done.")
 
@@ -329,6 +736,7 @@ def main():
       - MIN_PEERS      (optional, default 10)
       - START_DAYS     (optional, integer)
       - END_DAYS       (optional, integer)
+      - RIPESTAT_CACHE_DIR (optional, default ".cache"; empty disables caching)
     """
     asns = _parse_env_list("ASNS")
     if not asns:
@@ -344,12 +752,16 @@ def main():
     start_days = int(start_days_env) if start_days_env not in (None, "") else None
     end_days = int(end_days_env) if end_days_env not in (None, "") else None
 
+    cache_dir_env = os.environ.get("RIPESTAT_CACHE_DIR", ".cache")
+    cache_dir = Path(cache_dir_env) if cache_dir_env else None
+
     build_feeds(
         asns=asns,
         min_peers=min_peers,
         start_days=start_days,
         end_days=end_days,
         out_dir=Path("feeds"),
+        cache_dir=cache_dir,
     )
 
 if __name__ == "__main__":
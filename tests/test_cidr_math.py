@@ -0,0 +1,120 @@
+"""
+Regression tests: the integer CIDR routines in build_multi_asn_feeds.py must
+agree with the stdlib ipaddress implementations they replaced
+(collapse_addresses, address_exclude, summarize_address_range, ip_network).
+
+Run with:  python -m unittest discover tests
+"""
+
+import ipaddress
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import build_multi_asn_feeds as feeds  # noqa: E402
+
+CASES = 1500
+
+
+def _random_net(rng: random.Random, version: int):
+    """Random network clustered into a small space so overlaps are common."""
+    if version == 4:
+        addr = (10 << 24) | rng.randrange(1 << 16) << 8
+        return ipaddress.IPv4Network((addr, rng.randrange(14, 33)), strict=False)
+    addr = (0x20010DB8 << 96) | rng.randrange(1 << 16) << 80
+    return ipaddress.IPv6Network((addr, rng.randrange(30, 65)), strict=False)
+
+
+def _to_set(version: int, nets) -> feeds.PrefixSet:
+    return feeds.PrefixSet.from_pairs(version, [(int(n.network_address), n.prefixlen) for n in nets])
+
+
+def _to_nets(prefixes: feeds.PrefixSet):
+    return [ipaddress.ip_network(line) for line in prefixes.lines()]
+
+
+def _reference_collapse(nets):
+    return sorted(ipaddress.collapse_addresses(nets), key=lambda n: (int(n.network_address), n.prefixlen))
+
+
+def _reference_exclude(nets, excludes):
+    """The original address_exclude-based subtraction, followed by a collapse."""
+    out = []
+    for net in nets:
+        result = [net]
+        for ex in excludes:
+            new_result = []
+            for r in result:
+                if ex.subnet_of(r):
+                    new_result.extend(r.address_exclude(ex))
+                elif not r.subnet_of(ex):
+                    new_result.append(r)
+            result = new_result
+        out.extend(result)
+    return _reference_collapse(out)
+
+
+class CidrMathTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(1234)
+
+    def test_normalize_matches_collapse_addresses(self):
+        for _ in range(CASES):
+            version = self.rng.choice((4, 6))
+            nets = [_random_net(self.rng, version) for _ in range(self.rng.randrange(40))]
+            got = _to_nets(feeds.normalize(_to_set(version, nets)))
+            self.assertEqual(got, _reference_collapse(nets), nets)
+
+    def test_range_to_cidrs_matches_summarize_address_range(self):
+        for _ in range(CASES):
+            bits, addr_cls = self.rng.choice(((32, ipaddress.IPv4Address), (128, ipaddress.IPv6Address)))
+            lo = self.rng.choice((0, self.rng.randrange(1 << bits)))
+            hi = self.rng.choice(((1 << bits) - 1, min((1 << bits) - 1, lo + self.rng.randrange(1 << 16))))
+            expected = [
+                (int(n.network_address), n.prefixlen)
+                for n in ipaddress.summarize_address_range(addr_cls(lo), addr_cls(hi))
+            ]
+            self.assertEqual(feeds._range_to_cidrs(lo, hi, bits), expected, (lo, hi))
+
+    def test_apply_exclusions_matches_address_exclude(self):
+        for _ in range(CASES):
+            version = self.rng.choice((4, 6))
+            nets = _reference_collapse([_random_net(self.rng, version) for _ in range(self.rng.randrange(30))])
+            excludes = [_random_net(self.rng, version) for _ in range(self.rng.randrange(1, 6))]
+            index = feeds.index_exclusions(excludes)
+            got = _to_nets(feeds.apply_exclusions(_to_set(version, nets), index))
+            self.assertEqual(got, _reference_exclude(nets, excludes), (nets, excludes))
+
+    def test_merge_normalized_matches_collapse_of_union(self):
+        for _ in range(CASES // 3):
+            version = self.rng.choice((4, 6))
+            groups = [
+                _reference_collapse([_random_net(self.rng, version) for _ in range(self.rng.randrange(15))])
+                for _ in range(self.rng.randrange(1, 5))
+            ]
+            got = _to_nets(feeds.merge_normalized(version, [_to_set(version, g) for g in groups]))
+            self.assertEqual(got, _reference_collapse([n for g in groups for n in g]), groups)
+
+    def test_parse_prefix_matches_ip_network(self):
+        samples = [
+            "1.2.3.4/24", "0.0.0.0/0", "255.255.255.255/32", "256.1.1.1/8", "1.2.3.4/33",
+            "01.2.3.4/8", "1.2.3.4", "1.2.3.4/024", "1.2.3.4/8\n", " 1.2.3.4/8",
+            "2001:db8::1/32", "::/0", "::ffff:1.2.3.4/120", "2001:db8::/129", "gg::/3",
+            "2001:db8:::/32", "1:2:3:4:5:6:7:8:9/64", "2001:db8::/32\n",
+        ]
+        for pfx in samples:
+            try:
+                net = ipaddress.ip_network(pfx, strict=False)
+                expected = (net.version, int(net.network_address), net.prefixlen)
+            except ValueError:
+                with self.assertRaises(ValueError, msg=pfx):
+                    feeds._parse_prefix(pfx)
+            else:
+                self.assertEqual(feeds._parse_prefix(pfx), expected, pfx)
+
+
+if __name__ == "__main__":
+    unittest.main()